@@ -6,28 +6,129 @@
  */
 
 import os
-import json
+import re
+import time
+import importlib
+import pathlib
+import threading
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
 import numpy as np
 import pandas as pd
+import orjson
+from joblib import Parallel, delayed
 from datetime import datetime
 import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+import spacy
+from spacy.lang.en.stop_words import STOP_WORDS
 
-# Download required NLTK resources
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('wordnet')
-nltk.download('vader_lexicon')
+# Required NLTK resources as (package, data path); tokenization and lemmatization are handled by spaCy
+NLTK_RESOURCES = [
+    ('vader_lexicon', 'sentiment/vader_lexicon.zip')
+]
+
+def _ensure_nltk():
+    """Download required NLTK resources that are not installed yet"""
+    for package, path in NLTK_RESOURCES:
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            nltk.download(package, quiet=True)
+
+# spaCy pipeline used for tokenization and lemmatization
+SPACY_MODEL = 'en_core_web_sm'
+
+def _load_spacy_model():
+    """Load the spaCy pipeline, downloading the model first if it is not installed"""
+    try:
+        return spacy.load(SPACY_MODEL, disable=['parser', 'ner'])
+    except OSError:
+        pass
+    
+    try:
+        from spacy.cli import download
+        download(SPACY_MODEL)
+        importlib.invalidate_caches()
+        return spacy.load(SPACY_MODEL, disable=['parser', 'ner'])
+    except (Exception, SystemExit) as e:
+        raise OSError(
+            f"spaCy model '{SPACY_MODEL}' is not installed and could not be downloaded; "
+            f"install it with 'python -m spacy download {SPACY_MODEL}'"
+        ) from e
+
+# Directory of this module, resolved once at import
+_HERE = pathlib.Path(__file__).parent
+
+@lru_cache(maxsize=None)
+def _read_hotel_vocabulary():
+    """Read the hotel vocabulary file once per process"""
+    vocab_path = _HERE / 'data' / 'hotel_vocabulary.json'
+    return orjson.loads(vocab_path.read_bytes()) if vocab_path.exists() else {}
+
+# VADER analyzer of a parallel worker process, created on its first batch
+_worker_sentiment_analyzer = None
+
+def _score_sentiment_batch(texts):
+    """Return compound sentiment for a batch of texts (runs in joblib workers; the parent fetches NLTK data)"""
+    global _worker_sentiment_analyzer
+    if _worker_sentiment_analyzer is None:
+        _worker_sentiment_analyzer = SentimentIntensityAnalyzer()
+    return [_worker_sentiment_analyzer.polarity_scores(text)['compound'] if text else 0.0 for text in texts]
+
+# Last formatted timestamp as (epoch second, ISO string), swapped atomically
+_last_timestamp = (None, '')
+
+def _iso_now():
+    """Return the current local time in ISO format, formatting at most once per second"""
+    global _last_timestamp
+    now = int(time.time())
+    second, iso = _last_timestamp
+    if now != second:
+        iso = datetime.fromtimestamp(now).isoformat()
+        _last_timestamp = (now, iso)
+    return iso
 
 class NLPService:
+    # Simple rule-based keywords by preference category (would be replaced with ML model in production)
+    PREFERENCE_KEYWORDS = {
+        'room_type': frozenset(['room', 'suite', 'view', 'bed', 'king', 'queen', 'double']),
+        'amenities': frozenset(['wifi', 'pool', 'gym', 'spa', 'bathroom', 'shower', 'toiletries']),
+        'food_beverage': frozenset(['breakfast', 'dinner', 'lunch', 'restaurant', 'bar', 'coffee', 'food']),
+        'service': frozenset(['staff', 'service', 'reception', 'concierge', 'housekeeping', 'check-in']),
+        'location': frozenset(['location', 'downtown', 'beach', 'airport', 'central', 'quiet']),
+        'activities': frozenset(['tour', 'excursion', 'activity', 'entertainment', 'show', 'concert'])
+    }
+    
+    # Query intent keywords in priority order
+    INTENT_KEYWORDS = {
+        'checkout_info': ['checkout', 'check out', 'leaving'],
+        'dining_info': ['breakfast', 'dining', 'restaurant'],
+        'wifi_info': ['wifi', 'internet', 'connection'],
+        'amenity_info': ['pool', 'swim', 'swimming'],
+        'spa_booking': ['spa', 'massage', 'treatment']
+    }
+    
+    _intent_answers = {
+        'checkout_info': "Check-out time is at 11:00 AM. Would you like to request a late check-out?",
+        'dining_info': "Breakfast is served at The Grand Restaurant from 6:30 AM to 10:30 AM.",
+        'wifi_info': "You can connect to our WiFi network 'Hotel_Guest' using your room number and last name.",
+        'amenity_info': "Our pool is open from 7:00 AM to 10:00 PM. Towels are provided poolside.",
+        'spa_booking': "Our spa offers a variety of treatments. Would you like me to book an appointment for you?",
+        'general': "I'm here to assist you with any questions about our hotel services. How can I help you today?"
+    }
+    
+    # From this many interactions, NLP work is spread over worker processes
+    PARALLEL_THRESHOLD = 5000
+    
     def __init__(self):
         """Initialize the NLP service with required components"""
-        self.sentiment_analyzer = SentimentIntensityAnalyzer()
-        self.lemmatizer = WordNetLemmatizer()
-        self.stop_words = set(stopwords.words('english'))
+        # Heavy components are created on first use (see the properties below)
+        self._sentiment_analyzer = None
+        self._nlp = None
+        self._init_lock = threading.Lock()
+        self.stop_words = STOP_WORDS
         
         # Load hotel-specific vocabulary if available
         self.hotel_vocabulary = self._load_hotel_vocabulary()
@@ -38,14 +139,50 @@ class NLPService:
             'service', 'location', 'activities'
         ]
         
+        # Map each keyword to its category for single-lookup extraction
+        self._keyword_to_category = {
+            keyword: category
+            for category, keywords in self.PREFERENCE_KEYWORDS.items()
+            for keyword in keywords
+        }
+        
+        # Compile all intent keywords into one alternation with a named group per intent.
+        # The lookahead reports overlapping matches so the highest-priority intent always wins.
+        self._intent_re = re.compile('(?=' + '|'.join(
+            f"(?P<{intent}>{'|'.join(map(re.escape, keywords))})"
+            for intent, keywords in self.INTENT_KEYWORDS.items()
+        ) + ')')
+        self._intent_priority = {intent: i for i, intent in enumerate(self.INTENT_KEYWORDS)}
+        
+        # Sentiment and preferences are pure functions of the text, so repeated
+        # queries are served from per-instance LRU caches
+        self._sentiment_cached = lru_cache(maxsize=4096)(self._score_sentiment)
+        self._preferences_cached = lru_cache(maxsize=4096)(self._extract_preferences_uncached)
+        
+    @property
+    def sentiment_analyzer(self):
+        """VADER sentiment analyzer, created on first use"""
+        if self._sentiment_analyzer is None:
+            with self._init_lock:
+                if self._sentiment_analyzer is None:
+                    _ensure_nltk()
+                    self._sentiment_analyzer = SentimentIntensityAnalyzer()
+        return self._sentiment_analyzer
+    
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded on first use"""
+        if self._nlp is None:
+            with self._init_lock:
+                if self._nlp is None:
+                    # Only the tokenizer, tagger and lemmatizer are needed for preprocessing
+                    self._nlp = _load_spacy_model()
+        return self._nlp
+    
     def _load_hotel_vocabulary(self):
         """Load hotel-specific vocabulary for better context understanding"""
         try:
-            vocab_path = os.path.join(os.path.dirname(__file__), 'data/hotel_vocabulary.json')
-            if os.path.exists(vocab_path):
-                with open(vocab_path, 'r') as f:
-                    return json.load(f)
-            return {}
+            return _read_hotel_vocabulary()
         except Exception as e:
             print(f"Error loading hotel vocabulary: {e}")
             return {}
@@ -68,6 +205,10 @@ class NLPService:
                 'negative': 0
             }
             
+        return dict(self._sentiment_cached(text))
+    
+    def _score_sentiment(self, text):
+        """Score text with VADER (cached through _sentiment_cached)"""
         sentiment = self.sentiment_analyzer.polarity_scores(text)
         return {
             'compound': sentiment['compound'],
@@ -89,38 +230,46 @@ class NLPService:
         if not text:
             return {category: [] for category in self.preference_categories}
             
-        # Tokenize and preprocess text
-        tokens = word_tokenize(text.lower())
-        tokens = [self.lemmatizer.lemmatize(token) for token in tokens if token.isalpha()]
-        tokens = [token for token in tokens if token not in self.stop_words]
+        return {category: list(tokens) for category, tokens in self._preferences_cached(text).items()}
+    
+    def _extract_preferences_uncached(self, text):
+        """Extract preferences as immutable tuples (cached through _preferences_cached)"""
+        preferences = self.extract_preferences_from_tokens(self._preprocess(text))
+        return {category: tuple(tokens) for category, tokens in preferences.items()}
+    
+    def extract_preferences_from_tokens(self, tokens):
+        """
+        Extract guest preferences from already preprocessed tokens
         
-        # Extract preferences by category
+        Args:
+            tokens (list): Lowercased, lemmatized tokens without stop words
+            
+        Returns:
+            dict: Extracted preferences by category
+        """
         preferences = {category: [] for category in self.preference_categories}
         
-        # Simple rule-based extraction (would be replaced with ML model in production)
-        room_keywords = ['room', 'suite', 'view', 'bed', 'king', 'queen', 'double']
-        amenity_keywords = ['wifi', 'pool', 'gym', 'spa', 'bathroom', 'shower', 'toiletries']
-        fb_keywords = ['breakfast', 'dinner', 'lunch', 'restaurant', 'bar', 'coffee', 'food']
-        service_keywords = ['staff', 'service', 'reception', 'concierge', 'housekeeping', 'check-in']
-        location_keywords = ['location', 'downtown', 'beach', 'airport', 'central', 'quiet']
-        activity_keywords = ['tour', 'excursion', 'activity', 'entertainment', 'show', 'concert']
-        
         for token in tokens:
-            if token in room_keywords:
-                preferences['room_type'].append(token)
-            elif token in amenity_keywords:
-                preferences['amenities'].append(token)
-            elif token in fb_keywords:
-                preferences['food_beverage'].append(token)
-            elif token in service_keywords:
-                preferences['service'].append(token)
-            elif token in location_keywords:
-                preferences['location'].append(token)
-            elif token in activity_keywords:
-                preferences['activities'].append(token)
+            category = self._keyword_to_category.get(token)
+            if category:
+                preferences[category].append(token)
         
         return preferences
     
+    def _preprocess(self, text):
+        """Tokenize, lemmatize and remove stop words from text"""
+        return self._doc_tokens(self.nlp(text))
+    
+    def _doc_tokens(self, doc):
+        """Extract lowercased lemmas of alphabetic tokens, skipping stop words unless they are preference keywords"""
+        tokens = []
+        for token in doc:
+            if token.is_alpha:
+                lemma = token.lemma_.lower()
+                if not token.is_stop or lemma in self._keyword_to_category:
+                    tokens.append(lemma)
+        return tokens
+    
     def generate_response(self, query, guest_profile=None, hotel_info=None):
         """
         Generate a response to a guest query
@@ -139,30 +288,13 @@ class NLPService:
         # Simple rule-based response for demonstration
         query_lower = query.lower()
         
-        # Analyze query intent
-        if any(word in query_lower for word in ['checkout', 'check out', 'leaving']):
-            answer = "Check-out time is at 11:00 AM. Would you like to request a late check-out?"
-            intent = "checkout_info"
-            
-        elif any(word in query_lower for word in ['breakfast', 'dining', 'restaurant']):
-            answer = "Breakfast is served at The Grand Restaurant from 6:30 AM to 10:30 AM."
-            intent = "dining_info"
-            
-        elif any(word in query_lower for word in ['wifi', 'internet', 'connection']):
-            answer = "You can connect to our WiFi network 'Hotel_Guest' using your room number and last name."
-            intent = "wifi_info"
-            
-        elif any(word in query_lower for word in ['pool', 'swim', 'swimming']):
-            answer = "Our pool is open from 7:00 AM to 10:00 PM. Towels are provided poolside."
-            intent = "amenity_info"
-            
-        elif any(word in query_lower for word in ['spa', 'massage', 'treatment']):
-            answer = "Our spa offers a variety of treatments. Would you like me to book an appointment for you?"
-            intent = "spa_booking"
-            
-        else:
-            answer = "I'm here to assist you with any questions about our hotel services. How can I help you today?"
-            intent = "general"
+        # Analyze query intent, preferring the highest-priority intent matched anywhere in the query
+        intent = min(
+            (match.lastgroup for match in self._intent_re.finditer(query_lower)),
+            key=self._intent_priority.get,
+            default='general'
+        )
+        answer = self._intent_answers[intent]
         
         # Personalize response if guest profile is available
         if guest_profile and 'firstName' in guest_profile:
@@ -171,7 +303,7 @@ class NLPService:
         return {
             'answer': answer,
             'intent': intent,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _iso_now(),
             'sentiment': self.analyze_sentiment(query)
         }
     
@@ -192,32 +324,41 @@ class NLPService:
                 'preferences': {category: [] for category in self.preference_categories}
             }
         
-        # Convert to DataFrame for analysis
-        df = pd.DataFrame(interactions)
+        texts = [interaction['text'] for interaction in interactions]
         
-        # Analyze sentiment trend
-        df['sentiment'] = df['text'].apply(lambda x: self.analyze_sentiment(x)['compound'])
-        sentiment_trend = df.groupby(pd.Grouper(key='timestamp', freq='D'))['sentiment'].mean().reset_index()
-        sentiment_trend = sentiment_trend.to_dict('records')
-        
-        # Extract common topics and preferences
-        all_text = ' '.join(df['text'].tolist())
-        preferences = self.extract_preferences(all_text)
+        # Score sentiment; large inputs are split across processes since texts are independent
+        if len(texts) >= self.PARALLEL_THRESHOLD:
+            sentiments = self._parallel_sentiments(texts)
+            docs = self.nlp.pipe(texts, batch_size=128, n_process=os.cpu_count() or 1)
+        else:
+            sentiments = np.fromiter(
+                (self._sentiment_cached(text)['compound'] if text else 0.0 for text in texts),
+                dtype=np.float64,
+                count=len(texts)
+            )
+            docs = self.nlp.pipe(texts, batch_size=64)
         
-        # Count word frequencies for topic extraction
-        tokens = word_tokenize(all_text.lower())
-        tokens = [self.lemmatizer.lemmatize(token) for token in tokens if token.isalpha()]
-        tokens = [token for token in tokens if token not in self.stop_words]
+        # Count topics and extract preferences in a single batched pass
+        topic_counts = Counter()
+        preferences = {category: [] for category in self.preference_categories}
+        for doc in docs:
+            tokens = self._doc_tokens(doc)
+            topic_counts.update(tokens)
+            for category, matches in self.extract_preferences_from_tokens(tokens).items():
+                preferences[category].extend(matches)
         
-        word_freq = {}
-        for token in tokens:
-            if token in word_freq:
-                word_freq[token] += 1
-            else:
-                word_freq[token] = 1
+        # Analyze sentiment trend (a Series over the timestamps avoids building a DataFrame of all interactions)
+        timestamps = pd.DatetimeIndex(pd.to_datetime([interaction['timestamp'] for interaction in interactions]), name='timestamp')
+        sentiment_trend = (
+            pd.Series(sentiments, index=timestamps, name='sentiment')
+            .resample('D')
+            .mean()
+            .reset_index()
+        )
+        sentiment_trend = sentiment_trend.to_dict('records')
         
-        # Get top topics
-        common_topics = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]
+        # Get top topics by word frequency
+        common_topics = topic_counts.most_common(10)
         common_topics = [{'topic': topic, 'frequency': freq} for topic, freq in common_topics]
         
         return {
@@ -225,9 +366,43 @@ class NLPService:
             'common_topics': common_topics,
             'preferences': preferences
         }
+    
+    def _parallel_sentiments(self, texts, chunk_size=1000):
+        """Score compound sentiment for many texts across worker processes"""
+        chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+        
+        # Fetch NLTK data once here so workers don't race to download it
+        _ensure_nltk()
+        results = Parallel(n_jobs=-1, prefer='processes')(
+            delayed(_score_sentiment_batch)(chunk) for chunk in chunks
+        )
+        return np.fromiter(chain.from_iterable(results), dtype=np.float64, count=len(texts))
+
+@lru_cache(maxsize=1)
+def get_nlp_service():
+    """Return the shared NLP service instance, creating it on first call"""
+    return NLPService()
+
+# Create the shared instance of the NLP service
+nlp_service = get_nlp_service()
 
-# Create an instance of the NLP service
-nlp_service = NLPService()
+def _json_default(obj):
+    """Serialize types orjson does not handle natively (e.g. pandas Timestamps)"""
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def serialize_response(obj):
+    """
+    Serialize a service response to JSON bytes
+    
+    Args:
+        obj (dict): Response returned by process_request
+        
+    Returns:
+        bytes: JSON-encoded response (NumPy values and datetimes included)
+    """
+    return orjson.dumps(obj, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
 
 # Function to handle API requests
 def process_request(request_data):
@@ -238,7 +413,7 @@ def process_request(request_data):
         request_data (dict): Request data
         
     Returns:
-        dict: Response data
+        dict: Response data (encode with serialize_response)
     """
     request_type = request_data.get('type')
     
@@ -5,18 +5,37 @@
  * for the RevenuePulse module of the FifthKeys platform.
  */
 
-import os
 import json
+import pathlib
+import threading
+from functools import lru_cache
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.preprocessing import OrdinalEncoder
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.model_selection import train_test_split
 import joblib
 
+# Directory holding trained model files, resolved once at import
+_MODELS_DIR = pathlib.Path(__file__).parent / 'models'
+
+# Serializes model loading so concurrent first loads don't read the same files twice
+_models_lock = threading.Lock()
+
+# One cache slot per model file (price, demand, revenue), so a retrained model evicts a stale one
+@lru_cache(maxsize=3)
+def _load_joblib(path, mtime_ns):
+    """Load a joblib model; cached on path and modification time so new instances reuse it"""
+    return joblib.load(path)
+
+@lru_cache(maxsize=1)
+def get_revenue_service():
+    """Return the shared Revenue Optimization service instance, creating it on first call"""
+    return RevenueOptimizationService()
+
 class RevenueOptimizationService:
     def __init__(self):
         """Initialize the Revenue Optimization service with required components"""
@@ -42,23 +61,27 @@ class RevenueOptimizationService:
         
     def _load_models(self):
         """Load pre-trained models if available"""
+        with _models_lock:
+            self._load_model_files()
+    
+    def _load_model_files(self):
+        """Load model files from the models directory (called with _models_lock held)"""
         try:
-            models_path = os.path.join(os.path.dirname(__file__), 'models')
-            if os.path.exists(models_path):
+            if _MODELS_DIR.exists():
                 # Load price optimization model
-                price_model_path = os.path.join(models_path, 'price_optimization_model.joblib')
-                if os.path.exists(price_model_path):
-                    self.models['price'] = joblib.load(price_model_path)
+                price_model_path = _MODELS_DIR / 'price_optimization_model.joblib'
+                if price_model_path.exists():
+                    self.models['price'] = _load_joblib(price_model_path, price_model_path.stat().st_mtime_ns)
                 
                 # Load demand forecasting model
-                demand_model_path = os.path.join(models_path, 'demand_forecasting_model.joblib')
-                if os.path.exists(demand_model_path):
-                    self.models['demand'] = joblib.load(demand_model_path)
+                demand_model_path = _MODELS_DIR / 'demand_forecasting_model.joblib'
+                if demand_model_path.exists():
+                    self.models['demand'] = _load_joblib(demand_model_path, demand_model_path.stat().st_mtime_ns)
                 
                 # Load revenue optimization model
-                revenue_model_path = os.path.join(models_path, 'revenue_optimization_model.joblib')
-                if os.path.exists(revenue_model_path):
-                    self.models['revenue'] = joblib.load(revenue_model_path)
+                revenue_model_path = _MODELS_DIR / 'revenue_optimization_model.joblib'
+                if revenue_model_path.exists():
+                    self.models['revenue'] = _load_joblib(revenue_model_path, revenue_model_path.stat().st_mtime_ns)
                 
                 print(f"Loaded {len(self.models)} pre-trained models")
             else:
@@ -69,10 +92,9 @@ class RevenueOptimizationService:
     def _save_model(self, model_type, model):
         """Save a trained model"""
         try:
-            models_path = os.path.join(os.path.dirname(__file__), 'models')
-            os.makedirs(models_path, exist_ok=True)
+            _MODELS_DIR.mkdir(parents=True, exist_ok=True)
             
-            model_path = os.path.join(models_path, f'{model_type}_model.joblib')
+            model_path = _MODELS_DIR / f'{model_type}_model.joblib'
             joblib.dump(model, model_path)
             print(f"Saved {model_type} model to {model_path}")
         except Exception as e:
@@ -104,27 +126,29 @@ class RevenueOptimizationService:
                                'competitor_price_index', 'event_score']
             categorical_features = ['day_of_week', 'month', 'is_weekend', 'is_holiday', 'room_type']
             
-            numeric_transformer = Pipeline(steps=[
-                ('scaler', StandardScaler())
-            ])
-            
+            # Histogram binning makes scaling unnecessary; categories are integer-coded
+            # (unseen categories become NaN, which the regressor treats as missing)
             categorical_transformer = Pipeline(steps=[
-                ('onehot', OneHotEncoder(handle_unknown='ignore'))
+                ('ordinal', OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=np.nan))
             ])
             
             preprocessor = ColumnTransformer(
                 transformers=[
-                    ('num', numeric_transformer, numeric_features),
+                    ('num', 'passthrough', numeric_features),
                     ('cat', categorical_transformer, categorical_features)
                 ])
             
+            # Categorical columns follow the numeric ones in the transformed matrix
+            categorical_indices = list(range(len(numeric_features), len(numeric_features) + len(categorical_features)))
+            
             # Create and train the model
             model = Pipeline(steps=[
                 ('preprocessor', preprocessor),
-                ('regressor', GradientBoostingRegressor(
-                    n_estimators=100, 
+                ('regressor', HistGradientBoostingRegressor(
+                    max_iter=100, 
                     learning_rate=0.1, 
                     max_depth=5, 
+                    categorical_features=categorical_indices,
                     random_state=42
                 ))
             ])
@@ -177,26 +201,28 @@ class RevenueOptimizationService:
                                'event_score', 'weather_score', 'historical_demand']
             categorical_features = ['day_of_week', 'month', 'is_weekend', 'is_holiday']
             
-            numeric_transformer = Pipeline(steps=[
-                ('scaler', StandardScaler())
-            ])
-            
+            # Histogram binning makes scaling unnecessary; categories are integer-coded
+            # (unseen categories become NaN, which the regressor treats as missing)
             categorical_transformer = Pipeline(steps=[
-                ('onehot', OneHotEncoder(handle_unknown='ignore'))
+                ('ordinal', OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=np.nan))
             ])
             
             preprocessor = ColumnTransformer(
                 transformers=[
-                    ('num', numeric_transformer, numeric_features),
+                    ('num', 'passthrough', numeric_features),
                     ('cat', categorical_transformer, categorical_features)
                 ])
             
+            # Categorical columns follow the numeric ones in the transformed matrix
+            categorical_indices = list(range(len(numeric_features), len(numeric_features) + len(categorical_features)))
+            
             # Create and train the model
             model = Pipeline(steps=[
                 ('preprocessor', preprocessor),
-                ('regressor', RandomForestRegressor(
-                    n_estimators=100, 
+                ('regressor', HistGradientBoostingRegressor(
+                    max_iter=100, 
                     max_depth=10, 
+                    categorical_features=categorical_indices,
                     random_state=42
                 ))
             ])
@@ -223,6 +249,12 @@ class RevenueOptimizationService:
                 'error': f'Error training demand forecasting model: {str(e)}'
             }
     
+    def _prediction_dates(self, input_data):
+        """Return the date column of the input, or 'Day N' labels if none is provided"""
+        if 'date' in input_data.columns:
+            return input_data['date'].to_numpy()
+        return [f'Day {i+1}' for i in range(len(input_data))]
+    
     def predict_optimal_prices(self, input_data):
         """
         Predict optimal prices based on input features
@@ -250,16 +282,14 @@ class RevenueOptimizationService:
             confidence_scores = np.ones(len(predictions)) * 0.85  # Placeholder
             
             # Prepare results
-            results = []
-            for i, (_, row) in enumerate(input_data.iterrows()):
-                results.append({
-                    'date': row.get('date', f'Day {i+1}'),
-                    'room_type': row.get('room_type', 'Standard'),
-                    'optimal_price': round(predictions[i], 2),
-                    'confidence_score': confidence_scores[i],
-                    'min_price': round(predictions[i] * 0.9, 2),
-                    'max_price': round(predictions[i] * 1.1, 2)
-                })
+            results = pd.DataFrame({
+                'date': self._prediction_dates(input_data),
+                'room_type': input_data['room_type'].to_numpy(),
+                'optimal_price': np.round(predictions, 2),
+                'confidence_score': confidence_scores,
+                'min_price': np.round(predictions * 0.9, 2),
+                'max_price': np.round(predictions * 1.1, 2)
+            }).to_dict('records')
             
             return {
                 'success': True,
@@ -298,15 +328,13 @@ class RevenueOptimizationService:
             confidence_scores = np.ones(len(predictions)) * 0.8  # Placeholder
             
             # Prepare results
-            results = []
-            for i, (_, row) in enumerate(input_data.iterrows()):
-                results.append({
-                    'date': row.get('date', f'Day {i+1}'),
-                    'forecasted_demand': round(predictions[i], 0),
-                    'confidence_score': confidence_scores[i],
-                    'min_demand': round(predictions[i] * 0.85, 0),
-                    'max_demand': round(predictions[i] * 1.15, 0)
-                })
+            results = pd.DataFrame({
+                'date': self._prediction_dates(input_data),
+                'forecasted_demand': np.round(predictions, 0),
+                'confidence_score': confidence_scores,
+                'min_demand': np.round(predictions * 0.85, 0),
+                'max_demand': np.round(predictions * 1.15, 0)
+            }).to_dict('records')
             
             return {
                 'success': True,
@@ -337,33 +365,51 @@ class RevenueOptimizationService:
             costs = scenario_data.get('costs', {'fixed': 2000, 'variable': 20})
             days = scenario_data.get('days', 30)
             
-            # Run simulation for each price variation
-            results = []
-            for variation in price_variations:
-                price = base_price * (1 + variation / 100)
-                
-                # Calculate demand based on price elasticity
-                demand = base_demand * (1 + demand_elasticity * (variation / 100))
-                demand = max(0, demand)  # Ensure non-negative demand
-                
-                # Calculate revenue and profit
-                revenue = price * demand * days
-                total_costs = costs['fixed'] + (costs['variable'] * demand * days)
-                profit = revenue - total_costs
-                
-                results.append({
+            # Occupancy is reported relative to base demand, so it cannot be zero
+            if base_demand == 0:
+                return {
+                    'error': 'Error running revenue simulation: base_demand must be non-zero'
+                }
+            
+            # Run simulation for all price variations at once
+            variations = np.asarray(price_variations, dtype=np.float64) / 100
+            prices = base_price * (1 + variations)
+            
+            # Calculate demand based on price elasticity, ensuring non-negative demand
+            demand = np.maximum(0, base_demand * (1 + demand_elasticity * variations))
+            
+            # Calculate revenue and profit
+            revenue = prices * demand * days
+            total_costs = costs['fixed'] + (costs['variable'] * demand * days)
+            profit = revenue - total_costs
+            profit_margin = np.divide(profit, revenue, out=np.zeros_like(profit), where=revenue > 0) * 100
+            
+            rounded_profit = np.round(profit, 0)
+            results = [
+                {
                     'price_variation': variation,
-                    'price': round(price, 2),
-                    'demand': round(demand, 0),
-                    'occupancy': round((demand / base_demand) * 100, 1),
-                    'revenue': round(revenue, 0),
-                    'costs': round(total_costs, 0),
-                    'profit': round(profit, 0),
-                    'profit_margin': round((profit / revenue) * 100, 1) if revenue > 0 else 0
-                })
+                    'price': price,
+                    'demand': scenario_demand,
+                    'occupancy': occupancy,
+                    'revenue': scenario_revenue,
+                    'costs': scenario_costs,
+                    'profit': scenario_profit,
+                    'profit_margin': margin
+                }
+                for variation, price, scenario_demand, occupancy, scenario_revenue, scenario_costs, scenario_profit, margin in zip(
+                    price_variations,
+                    np.round(prices, 2).tolist(),
+                    np.round(demand, 0).tolist(),
+                    np.round((demand / base_demand) * 100, 1).tolist(),
+                    np.round(revenue, 0).tolist(),
+                    np.round(total_costs, 0).tolist(),
+                    rounded_profit.tolist(),
+                    np.round(profit_margin, 1).tolist()
+                )
+            ]
             
             # Find optimal price point
-            optimal_result = max(results, key=lambda x: x['profit'])
+            optimal_result = results[int(np.argmax(rounded_profit))]
             
             return {
                 'success': True,
@@ -7,8 +7,10 @@
 
 import os
 import json
+from operator import itemgetter
 import numpy as np
 import pandas as pd
+import orjson
 from datetime import datetime, timedelta
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
@@ -17,7 +19,116 @@ import seaborn as sns
 from scipy.optimize import linear_sum_assignment
 import networkx as nx
 
+try:
+    import numba
+except ImportError:  # numba is optional; heatmaps fall back to NumPy binning
+    numba = None
+
+# Use the multi-threaded scatter kernel from this many readings, as long as one
+# private grid per thread stays within the cell budget
+PARALLEL_SCATTER_MIN_READINGS = 1_000_000
+PARALLEL_SCATTER_MAX_GRID_CELLS = 1_000_000
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _scatter_add(ys, xs, values, grid):
+        """Add values[i] to grid[ys[i], xs[i]], skipping coordinates outside the grid"""
+        for i in range(values.shape[0]):
+            y = ys[i]
+            x = xs[i]
+            if 0 <= x < grid.shape[1] and 0 <= y < grid.shape[0]:
+                grid[y, x] += values[i]
+    
+    @numba.njit(cache=True, parallel=True)
+    def _scatter_add_parallel(ys, xs, values, grid, n_tiles):
+        """Parallel _scatter_add: each thread fills a private tile, tiles are summed at the end"""
+        tiles = np.zeros((n_tiles, grid.shape[0], grid.shape[1]), dtype=grid.dtype)
+        chunk = (values.shape[0] + n_tiles - 1) // n_tiles
+        for t in numba.prange(n_tiles):
+            for i in range(t * chunk, min((t + 1) * chunk, values.shape[0])):
+                y = ys[i]
+                x = xs[i]
+                if 0 <= x < grid.shape[1] and 0 <= y < grid.shape[0]:
+                    tiles[t, y, x] += values[i]
+        for t in range(n_tiles):
+            grid += tiles[t]
+
+def _scatter_into_grid(grid, ys, xs, values):
+    """Accumulate sensor values into grid cells, ignoring out-of-bounds coordinates"""
+    if numba is not None:
+        n_threads = numba.get_num_threads()
+        if (len(values) >= PARALLEL_SCATTER_MIN_READINGS
+                and grid.size * n_threads <= PARALLEL_SCATTER_MAX_GRID_CELLS):
+            _scatter_add_parallel(ys, xs, values, grid, n_threads)
+        else:
+            _scatter_add(ys, xs, values, grid)
+        return
+    
+    # Without numba, bincount over flattened cell indices handles repeated cells efficiently
+    height, width = grid.shape
+    in_bounds = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+    cells = ys[in_bounds] * width + xs[in_bounds]
+    grid += np.bincount(cells, weights=values[in_bounds], minlength=grid.size).reshape(height, width)
+
+def _columns_frame(records, columns):
+    """
+    Build a DataFrame one column at a time instead of row by row
+    
+    Args:
+        records (list, dict or DataFrame): List of reading dicts, a dict of column lists, or a DataFrame
+        columns (list): Columns to extract; ones absent from the input are left out
+        
+    Returns:
+        DataFrame: The requested columns
+    """
+    if isinstance(records, pd.DataFrame):
+        return records[[c for c in columns if c in records]]
+    if isinstance(records, dict):
+        return pd.DataFrame({c: records[c] for c in columns if c in records})
+    return pd.DataFrame({
+        c: [r.get(c) for r in records] for c in columns if any(c in r for r in records)
+    })
+
+def _utc_offset(timestamp):
+    """Return the UTC offset of an ISO timestamp string as '+HH:MM', or None if it has no zone"""
+    offset = pd.Timestamp(timestamp).utcoffset()
+    if offset is None:
+        return None
+    minutes = int(offset.total_seconds()) // 60
+    sign = '+' if minutes >= 0 else '-'
+    return f'{sign}{abs(minutes) // 60:02d}:{abs(minutes) % 60:02d}'
+
+def _profiles_by_space(frame, key_column, ids_by_key):
+    """
+    Turn a (space_id, key, value) Polars frame into rounded per-space profiles
+    
+    Args:
+        frame (polars.DataFrame): Mean occupancy per space and profile key
+        key_column (str): Profile key column, e.g. hour or day_of_week
+        ids_by_key (dict): space_data keys by their string form
+        
+    Returns:
+        dict: Profile dicts keyed by space id
+    """
+    profiles = {}
+    columns = zip(frame['space_id'].to_list(), frame[key_column].to_list(), np.round(frame['value'].to_numpy(), 2).tolist())
+    for space_key, key, value in columns:
+        profiles.setdefault(ids_by_key[space_key], {})[key] = value
+    return profiles
+
+def _parse_timestamps(timestamps):
+    """Parse ISO 8601 strings without per-row format inference; anything else (epoch numbers, other formats) as pd.to_datetime does"""
+    if pd.api.types.is_string_dtype(timestamps):
+        try:
+            return pd.to_datetime(timestamps, format='ISO8601', cache=True)
+        except ValueError:
+            pass
+    return pd.to_datetime(timestamps)
+
 class SpaceOptimizationService:
+    # Configuration shared by all instances, read from disk once per process
+    _config_cache = None
+    
     def __init__(self):
         """Initialize the Space Optimization service with required components"""
         # Load configuration if available
@@ -56,13 +167,18 @@ class SpaceOptimizationService:
         }
         
     def _load_config(self):
-        """Load configuration from file if available"""
+        """Load configuration from file if available (cached at class level)"""
+        if SpaceOptimizationService._config_cache is not None:
+            return SpaceOptimizationService._config_cache
+        
         try:
             config_path = os.path.join(os.path.dirname(__file__), 'config/space_optimization_config.json')
+            config = {}
             if os.path.exists(config_path):
                 with open(config_path, 'r') as f:
-                    return json.load(f)
-            return {}
+                    config = json.load(f)
+            SpaceOptimizationService._config_cache = config
+            return config
         except Exception as e:
             print(f"Error loading configuration: {e}")
             return {}
@@ -73,115 +189,245 @@ class SpaceOptimizationService:
         
         Args:
             space_data (dict): Information about hotel spaces
-            sensor_data (list): Occupancy sensor data
+            sensor_data (list, dict or DataFrame): Occupancy sensor readings, or their columns
             
         Returns:
             dict: Space utilization analysis
         """
         try:
             # Convert sensor data to DataFrame
-            sensor_df = pd.DataFrame(sensor_data)
+            sensor_df = _columns_frame(sensor_data, ['timestamp', 'space_id', 'value'])
             
             # Ensure required columns exist
             if 'timestamp' not in sensor_df.columns or 'space_id' not in sensor_df.columns or 'value' not in sensor_df.columns:
                 return {'error': 'Sensor data missing required columns (timestamp, space_id, value)'}
             
+            # Keep only readings for known spaces, with space ids encoded as categories of space_data keys
+            space_ids = list(space_data.keys())
+            space_codes = pd.Index(space_ids).get_indexer(sensor_df['space_id'])
+            known = space_codes >= 0
+            if not known.all():
+                sensor_df = sensor_df.loc[known].copy()
+            sensor_df['space_id'] = pd.Categorical.from_codes(space_codes[known], categories=space_ids)
+            
             # Convert timestamp to datetime
-            sensor_df['timestamp'] = pd.to_datetime(sensor_df['timestamp'])
+            sensor_df['timestamp'] = _parse_timestamps(sensor_df['timestamp'])
+            sensor_df['hour'] = sensor_df['timestamp'].dt.hour
+            sensor_df['day_of_week'] = sensor_df['timestamp'].dt.dayofweek
             
-            # Group by space and calculate metrics
-            space_metrics = {}
+            # Aggregate all spaces in a single groupby pass
+            space_groups = sensor_df.groupby('space_id', observed=False, sort=False)['value']
+            avg_occupancies = space_groups.mean().reindex(space_ids).to_numpy()
+            data_points = space_groups.size().reindex(space_ids).to_numpy()
             
-            for space_id, space_info in space_data.items():
-                space_sensors = sensor_df[sensor_df['space_id'] == space_id]
-                
-                if not space_sensors.empty:
-                    # Calculate average occupancy
-                    avg_occupancy = space_sensors['value'].mean()
-                    
-                    # Calculate peak occupancy and time
-                    peak_idx = space_sensors['value'].idxmax()
-                    peak_occupancy = space_sensors.loc[peak_idx, 'value']
-                    peak_time = space_sensors.loc[peak_idx, 'timestamp']
-                    
-                    # Calculate occupancy by hour of day
-                    space_sensors['hour'] = space_sensors['timestamp'].dt.hour
-                    hourly_occupancy = space_sensors.groupby('hour')['value'].mean().to_dict()
-                    
-                    # Calculate occupancy by day of week
-                    space_sensors['day_of_week'] = space_sensors['timestamp'].dt.dayofweek
-                    daily_occupancy = space_sensors.groupby('day_of_week')['value'].mean().to_dict()
-                    
-                    # Calculate utilization efficiency
-                    capacity = space_info.get('capacity', 100)
-                    utilization_rate = (avg_occupancy / capacity) * 100 if capacity > 0 else 0
-                    
-                    space_metrics[space_id] = {
-                        'space_name': space_info.get('name', f'Space {space_id}'),
-                        'space_type': space_info.get('type', 'unknown'),
-                        'area': space_info.get('area', 0),
-                        'capacity': capacity,
-                        'avg_occupancy': round(avg_occupancy, 2),
-                        'peak_occupancy': round(peak_occupancy, 2),
-                        'peak_time': peak_time.isoformat(),
-                        'utilization_rate': round(utilization_rate, 2),
-                        'hourly_occupancy': {str(h): round(occ, 2) for h, occ in hourly_occupancy.items()},
-                        'daily_occupancy': {str(d): round(occ, 2) for d, occ in daily_occupancy.items()},
-                        'data_points': len(space_sensors)
-                    }
+            # Fetch every space's peak reading with one row lookup
+            peak_indices = sensor_df.groupby('space_id', observed=True, sort=False)['value'].idxmax()
+            peak_rows = sensor_df.loc[peak_indices.to_numpy(), ['timestamp', 'value']]
+            peak_values = dict(zip(peak_indices.index, peak_rows['value'].round(2).tolist()))
+            peak_times = dict(zip(peak_indices.index, (timestamp.isoformat() for timestamp in peak_rows['timestamp'])))
+            
+            # Mean occupancy profiles by hour of day and day of week
+            hourly_profiles = sensor_df.groupby(['space_id', 'hour'], observed=False)['value'].mean().unstack().round(2).to_dict(orient='index')
+            daily_profiles = sensor_df.groupby(['space_id', 'day_of_week'], observed=False)['value'].mean().unstack().round(2).to_dict(orient='index')
+            
+            return self._utilization_report(
+                space_data, avg_occupancies, data_points, peak_values, peak_times, hourly_profiles, daily_profiles
+            )
+            
+        except Exception as e:
+            return {'error': f'Error analyzing space utilization: {str(e)}'}
+    
+    def analyze_space_utilization_path(self, space_data, sensor_path):
+        """
+        Analyze space utilization from a newline-delimited JSON file of sensor readings
+        
+        The file is scanned lazily with Polars and aggregated in streaming mode, so
+        sensor logs larger than memory are never loaded as a whole.
+        
+        Args:
+            space_data (dict): Information about hotel spaces
+            sensor_path (str): Path to an NDJSON file of readings with timestamp, space_id and value
+            
+        Returns:
+            dict: Space utilization analysis
+        """
+        try:
+            import polars as pl
+            
+            scan = pl.scan_ndjson(sensor_path)
+            
+            # Ensure required columns exist
+            if not {'timestamp', 'space_id', 'value'} <= set(scan.collect_schema().names()):
+                return {'error': 'Sensor data missing required columns (timestamp, space_id, value)'}
+            
+            # Parse timestamps as pd.to_datetime would: naive strings stay naive, numbers are epoch
+            # nanoseconds, and offsets are kept (Polars needs the zone up front, so take the first reading's)
+            if scan.collect_schema()['timestamp'] == pl.String:
+                first_timestamps = scan.select('timestamp').head(1).collect().to_series().to_list()
+                offset = _utc_offset(first_timestamps[0]) if first_timestamps else None
+                if offset is None:
+                    timestamps = pl.col('timestamp').str.to_datetime()
                 else:
-                    space_metrics[space_id] = {
-                        'space_name': space_info.get('name', f'Space {space_id}'),
-                        'space_type': space_info.get('type', 'unknown'),
-                        'area': space_info.get('area', 0),
-                        'capacity': space_info.get('capacity', 0),
-                        'avg_occupancy': 0,
-                        'peak_occupancy': 0,
-                        'peak_time': None,
-                        'utilization_rate': 0,
-                        'hourly_occupancy': {},
-                        'daily_occupancy': {},
-                        'data_points': 0,
-                        'note': 'No sensor data available for this space'
-                    }
-            
-            # Calculate overall metrics
-            total_area = sum(space_info.get('area', 0) for space_info in space_data.values())
-            total_capacity = sum(space_info.get('capacity', 0) for space_info in space_data.values())
-            
-            weighted_utilization = 0
-            if total_area > 0:
-                for space_id, metrics in space_metrics.items():
-                    space_area = space_data[space_id].get('area', 0)
-                    weighted_utilization += (metrics['utilization_rate'] * space_area / total_area)
+                    timestamps = pl.col('timestamp').str.to_datetime(time_zone='UTC').dt.convert_time_zone(offset)
+            else:
+                timestamps = pl.from_epoch('timestamp', time_unit='ns')
             
-            return {
-                'success': True,
-                'analysis_date': datetime.now().isoformat(),
-                'total_spaces': len(space_data),
-                'total_area': total_area,
-                'total_capacity': total_capacity,
-                'overall_utilization_rate': round(weighted_utilization, 2),
-                'space_metrics': space_metrics
-            }
+            # Match space ids as strings and map them back to the space_data keys
+            space_ids = list(space_data.keys())
+            ids_by_key = {str(k): k for k in space_ids}
+            
+            readings = (
+                scan.select(
+                    timestamps,
+                    pl.col('space_id').cast(pl.String),
+                    pl.col('value').cast(pl.Float64)
+                )
+                .filter(pl.col('space_id').is_in(list(ids_by_key)))
+            )
+            
+            # Aggregate per space and per hour/day of week from a single scan
+            stats = readings.group_by('space_id').agg(
+                pl.col('value').mean().alias('avg_occupancy'),
+                pl.col('value').max().alias('peak_occupancy'),
+                pl.col('timestamp').get(pl.col('value').arg_max()).alias('peak_time'),
+                pl.len().alias('data_points')
+            )
+            hourly = (
+                readings.group_by('space_id', pl.col('timestamp').dt.hour().alias('hour'))
+                .agg(pl.col('value').mean())
+                .sort('hour')
+            )
+            daily = (
+                readings.group_by('space_id', (pl.col('timestamp').dt.weekday() - 1).alias('day_of_week'))
+                .agg(pl.col('value').mean())
+                .sort('day_of_week')
+            )
+            stats, hourly, daily = pl.collect_all([stats, hourly, daily], engine='streaming')
+            
+            # Align the per-space aggregates to space_data order
+            positions = {k: i for i, k in enumerate(space_ids)}
+            stats_ids = [ids_by_key[k] for k in stats['space_id'].to_list()]
+            rows = [positions[k] for k in stats_ids]
+            avg_occupancies = np.full(len(space_ids), np.nan)
+            avg_occupancies[rows] = stats['avg_occupancy'].to_numpy()
+            data_points = np.zeros(len(space_ids), dtype=np.int64)
+            data_points[rows] = stats['data_points'].to_numpy()
+            
+            peak_values = dict(zip(stats_ids, np.round(stats['peak_occupancy'].to_numpy(), 2).tolist()))
+            peak_times = dict(zip(stats_ids, (timestamp.isoformat() for timestamp in stats['peak_time'].to_list())))
+            
+            return self._utilization_report(
+                space_data, avg_occupancies, data_points, peak_values, peak_times,
+                _profiles_by_space(hourly, 'hour', ids_by_key), _profiles_by_space(daily, 'day_of_week', ids_by_key)
+            )
             
         except Exception as e:
             return {'error': f'Error analyzing space utilization: {str(e)}'}
     
-    def generate_heatmap(self, sensor_data, space_layout):
+    def _utilization_report(self, space_data, avg_occupancies, data_points, peak_values, peak_times,
+                            hourly_profiles, daily_profiles):
+        """
+        Assemble the space utilization analysis from per-space aggregates
+        
+        Args:
+            space_data (dict): Information about hotel spaces
+            avg_occupancies (ndarray): Mean occupancy per space, in space_data order
+            data_points (ndarray): Number of readings per space, in space_data order
+            peak_values (dict): Rounded peak occupancy by space id
+            peak_times (dict): ISO timestamp of the peak reading by space id
+            hourly_profiles (dict): Rounded mean occupancy by hour of day, by space id
+            daily_profiles (dict): Rounded mean occupancy by day of week, by space id
+            
+        Returns:
+            dict: Space utilization analysis
+        """
+        spaces = list(space_data.values())
+        n = len(spaces)
+        
+        # Extract per-space area and capacity once, aligned to space_data order
+        areas = np.fromiter((info.get('area', 0) for info in spaces), dtype=np.float64, count=n)
+        capacities = np.fromiter((info.get('capacity', 0) for info in spaces), dtype=np.float64, count=n)
+        
+        # Utilization rate per space from a reciprocal-capacity table (spaces with readings default to capacity 100)
+        rate_capacities = np.fromiter((info.get('capacity', 100) for info in spaces), dtype=np.float64, count=n)
+        inv_capacities = np.divide(1.0, rate_capacities, out=np.zeros_like(rate_capacities), where=rate_capacities > 0)
+        utilization = avg_occupancies * inv_capacities * 100.0
+        
+        # Round reported figures once for all spaces
+        avg_reported = np.round(avg_occupancies, 2).tolist()
+        utilization_reported = np.round(utilization, 2).tolist()
+        
+        # Calculate metrics per space
+        space_metrics = {}
+        
+        for i, (space_id, space_info) in enumerate(space_data.items()):
+            if data_points[i] > 0:
+                space_metrics[space_id] = {
+                    'space_name': space_info.get('name', f'Space {space_id}'),
+                    'space_type': space_info.get('type', 'unknown'),
+                    'area': space_info.get('area', 0),
+                    'capacity': space_info.get('capacity', 100),
+                    'avg_occupancy': avg_reported[i],
+                    'peak_occupancy': peak_values[space_id],
+                    'peak_time': peak_times[space_id],
+                    'utilization_rate': utilization_reported[i],
+                    # Occupancy by hour of day and day of week (only those with readings)
+                    'hourly_occupancy': {str(h): occ for h, occ in hourly_profiles[space_id].items() if pd.notna(occ)},
+                    'daily_occupancy': {str(d): occ for d, occ in daily_profiles[space_id].items() if pd.notna(occ)},
+                    'data_points': int(data_points[i])
+                }
+            else:
+                space_metrics[space_id] = {
+                    'space_name': space_info.get('name', f'Space {space_id}'),
+                    'space_type': space_info.get('type', 'unknown'),
+                    'area': space_info.get('area', 0),
+                    'capacity': space_info.get('capacity', 0),
+                    'avg_occupancy': 0,
+                    'peak_occupancy': 0,
+                    'peak_time': None,
+                    'utilization_rate': 0,
+                    'hourly_occupancy': {},
+                    'daily_occupancy': {},
+                    'data_points': 0,
+                    'note': 'No sensor data available for this space'
+                }
+        
+        # Calculate overall metrics
+        total_area = float(areas.sum())
+        total_capacity = float(capacities.sum())
+        
+        weighted_utilization = 0
+        if total_area > 0:
+            utilization_rates = np.fromiter(
+                (metrics['utilization_rate'] for metrics in space_metrics.values()), dtype=np.float64, count=n
+            )
+            weighted_utilization = float((utilization_rates * areas).sum() / total_area)
+        
+        return {
+            'success': True,
+            'analysis_date': datetime.now().isoformat(),
+            'total_spaces': len(space_data),
+            'total_area': total_area,
+            'total_capacity': total_capacity,
+            'overall_utilization_rate': round(weighted_utilization, 2),
+            'space_metrics': space_metrics
+        }
+    
+    def generate_heatmap(self, sensor_data, space_layout, return_bytes=False):
         """
         Generate a heatmap of space utilization
         
         Args:
-            sensor_data (list): Occupancy sensor data
+            sensor_data (list, dict or DataFrame): Occupancy sensor readings, or their columns
             space_layout (dict): Layout information for the space
+            return_bytes (bool): Return the grid as JSON bytes (heatmap_data_json) instead of nested lists
             
         Returns:
             dict: Heatmap data
         """
         try:
             # Convert sensor data to DataFrame
-            sensor_df = pd.DataFrame(sensor_data)
+            sensor_df = _columns_frame(sensor_data, ['x', 'y', 'value'])
             
             # Ensure required columns exist
             if 'x' not in sensor_df.columns or 'y' not in sensor_df.columns or 'value' not in sensor_df.columns:
@@ -195,34 +441,37 @@ class SpaceOptimizationService:
             # Create a grid for the heatmap
             grid_width = int(width / resolution)
             grid_height = int(height / resolution)
-            heatmap_grid = np.zeros((grid_height, grid_width))
-            
-            # Populate the grid with sensor data
-            for _, row in sensor_df.iterrows():
-                x = int(row['x'] / resolution)
-                y = int(row['y'] / resolution)
-                
-                # Ensure coordinates are within grid bounds
-                if 0 <= x < grid_width and 0 <= y < grid_height:
-                    heatmap_grid[y, x] += row['value']
+            heatmap_grid = np.zeros((grid_height, grid_width), dtype=np.float32)
             
-            # Normalize the grid
-            if np.max(heatmap_grid) > 0:
-                heatmap_grid = heatmap_grid / np.max(heatmap_grid)
+            # Populate the grid with sensor data (casting truncates toward zero like int())
+            xs = np.ascontiguousarray((sensor_df['x'].to_numpy() / resolution).astype(np.intp))
+            ys = np.ascontiguousarray((sensor_df['y'].to_numpy() / resolution).astype(np.intp))
+            values = np.ascontiguousarray(sensor_df['value'].to_numpy(dtype=np.float32))
+            _scatter_into_grid(heatmap_grid, ys, xs, values)
             
-            # Convert to list format for JSON serialization
-            heatmap_data = heatmap_grid.tolist()
+            # Normalize the grid in place
+            grid_max = heatmap_grid.max()
+            if grid_max > 0:
+                heatmap_grid /= grid_max
             
-            return {
+            result = {
                 'success': True,
                 'width': width,
                 'height': height,
                 'resolution': resolution,
                 'grid_width': grid_width,
-                'grid_height': grid_height,
-                'heatmap_data': heatmap_data
+                'grid_height': grid_height
             }
             
+            if return_bytes:
+                # Serialize the grid directly from the array, without building Python floats
+                result['heatmap_data_json'] = orjson.dumps(heatmap_grid, option=orjson.OPT_SERIALIZE_NUMPY)
+            else:
+                # Convert to list format for JSON serialization
+                result['heatmap_data'] = heatmap_grid.tolist()
+            
+            return result
+            
         except Exception as e:
             return {'error': f'Error generating heatmap: {str(e)}'}
     
@@ -243,93 +492,88 @@ class SpaceOptimizationService:
             min_area_change = constraints.get('min_area_change', -20)  # percentage
             max_area_change = constraints.get('max_area_change', 20)   # percentage
             
-            # Prepare recommendations
-            recommendations = {}
+            # Pack the spaces that have an area and capacity into parallel arrays
+            space_ids = [k for k, v in space_data.items() if v.get('area', 0) > 0 and v.get('capacity', 0) > 0]
+            spaces = [space_data[k] for k in space_ids]
+            n = len(spaces)
+            current_areas = np.fromiter(map(itemgetter('area'), spaces), dtype=np.float64, count=n)
+            current_capacities = np.fromiter(map(itemgetter('capacity'), spaces), dtype=np.float64, count=n)
+            utilization_rates = np.fromiter((info.get('utilization_rate', 0) for info in spaces), dtype=np.float64, count=n)
             
-            for space_id, space_info in space_data.items():
-                space_type = space_info.get('type', 'unknown')
-                current_area = space_info.get('area', 0)
-                current_capacity = space_info.get('capacity', 0)
-                utilization_rate = space_info.get('utilization_rate', 0)
-                
-                if current_area <= 0 or current_capacity <= 0:
-                    continue
-                
-                # Calculate optimal area based on utilization
-                area_change_percent = 0
-                capacity_change_percent = 0
-                
-                if optimization_type == 'efficiency':
-                    # If utilization is high, increase area
-                    if utilization_rate > 80:
-                        area_change_percent = min(max_area_change, (utilization_rate - 80) * 0.5)
-                    # If utilization is low, decrease area
-                    elif utilization_rate < 50:
-                        area_change_percent = max(min_area_change, (utilization_rate - 50) * 0.5)
-                    
-                    # Adjust capacity proportionally
-                    capacity_change_percent = area_change_percent
-                    
-                elif optimization_type == 'cost':
-                    # Focus on reducing underutilized spaces
-                    if utilization_rate < 40:
-                        area_change_percent = max(min_area_change, (utilization_rate - 40) * 0.75)
-                    
-                    # Adjust capacity to maintain density
-                    capacity_change_percent = area_change_percent
-                    
-                elif optimization_type == 'revenue':
-                    # Prioritize high-revenue spaces
-                    revenue_potential = space_info.get('revenue_potential', 1)
-                    
-                    if revenue_potential > 1.5 and utilization_rate > 70:
-                        # High revenue potential and good utilization - expand
-                        area_change_percent = min(max_area_change, 15)
-                    elif revenue_potential < 0.8 and utilization_rate < 60:
-                        # Low revenue potential and poor utilization - reduce
-                        area_change_percent = max(min_area_change, -15)
-                    
-                    # Adjust capacity proportionally
-                    capacity_change_percent = area_change_percent
-                
-                # Calculate new area and capacity
-                new_area = current_area * (1 + area_change_percent / 100)
-                new_capacity = current_capacity * (1 + capacity_change_percent / 100)
-                
-                # Get default efficiency for this space type
-                default_efficiency = self.default_efficiency.get(space_type, 0.7)
-                
-                # Calculate impact
-                current_efficiency = utilization_rate / 100
-                new_efficiency = min(0.95, current_efficiency * (1 - area_change_percent / 200))
-                efficiency_change = (new_efficiency - current_efficiency) * 100
+            # Calculate optimal area changes based on utilization
+            area_change_percents = np.zeros(n)
+            
+            if optimization_type == 'efficiency':
+                # If utilization is high, increase area; if it is low, decrease area
+                high = utilization_rates > 80
+                low = utilization_rates < 50
+                area_change_percents[high] = np.minimum(max_area_change, (utilization_rates[high] - 80) * 0.5)
+                area_change_percents[low] = np.maximum(min_area_change, (utilization_rates[low] - 50) * 0.5)
                 
-                # Calculate financial impact (simplified)
-                area_cost = 1000  # Cost per square meter
-                revenue_per_guest = 50  # Revenue per guest
+            elif optimization_type == 'cost':
+                # Focus on reducing underutilized spaces
+                low = utilization_rates < 40
+                area_change_percents[low] = np.maximum(min_area_change, (utilization_rates[low] - 40) * 0.75)
                 
-                cost_impact = (new_area - current_area) * area_cost
-                revenue_impact = (new_capacity * new_efficiency - current_capacity * current_efficiency) * revenue_per_guest * 365
+            elif optimization_type == 'revenue':
+                # Prioritize high-revenue spaces
+                revenue_potentials = np.fromiter((info.get('revenue_potential', 1) for info in spaces), dtype=np.float64, count=n)
                 
-                # Prepare recommendation
+                # Expand spaces with high revenue potential and good utilization, reduce the opposite
+                area_change_percents[(revenue_potentials > 1.5) & (utilization_rates > 70)] = min(max_area_change, 15)
+                area_change_percents[(revenue_potentials < 0.8) & (utilization_rates < 60)] = max(min_area_change, -15)
+            
+            # Adjust capacity proportionally and calculate new area and capacity
+            capacity_change_percents = area_change_percents
+            new_areas = current_areas * (1 + area_change_percents / 100)
+            new_capacities = current_capacities * (1 + capacity_change_percents / 100)
+            
+            # Calculate impact
+            current_efficiencies = utilization_rates / 100
+            new_efficiencies = np.minimum(0.95, current_efficiencies * (1 - area_change_percents / 200))
+            efficiency_changes = (new_efficiencies - current_efficiencies) * 100
+            
+            # Calculate financial impact (simplified)
+            area_cost = 1000  # Cost per square meter
+            revenue_per_guest = 50  # Revenue per guest
+            
+            cost_impacts = (new_areas - current_areas) * area_cost
+            revenue_impacts = (new_capacities * new_efficiencies - current_capacities * current_efficiencies) * revenue_per_guest * 365
+            payback_periods = np.full(n, np.inf)
+            np.divide(cost_impacts, revenue_impacts, out=payback_periods, where=revenue_impacts > 0)
+            
+            # Round the reported columns once, then build one dict per space from their rows
+            report_columns = {
+                'current_area': np.round(current_areas, 2),
+                'recommended_area': np.round(new_areas, 2),
+                'area_change': np.round(new_areas - current_areas, 2),
+                'area_change_percent': np.round(area_change_percents, 2),
+                'current_capacity': np.round(current_capacities),
+                'recommended_capacity': np.round(new_capacities),
+                'capacity_change': np.round(new_capacities - current_capacities),
+                'current_efficiency': np.round(current_efficiencies * 100, 2),
+                'projected_efficiency': np.round(new_efficiencies * 100, 2),
+                'efficiency_change': np.round(efficiency_changes, 2)
+            }
+            financial_columns = {
+                'cost_impact': np.round(cost_impacts),
+                'annual_revenue_impact': np.round(revenue_impacts),
+                'payback_period': np.round(payback_periods, 2)
+            }
+            report_keys = list(report_columns)
+            report_rows = zip(*(column.tolist() for column in report_columns.values()))
+            financial_keys = list(financial_columns)
+            financial_rows = zip(*(column.tolist() for column in financial_columns.values()))
+            
+            # Prepare recommendations
+            recommendations = {}
+            
+            for space_id, space_info, report_row, financial_row in zip(space_ids, spaces, report_rows, financial_rows):
                 recommendations[space_id] = {
                     'space_name': space_info.get('name', f'Space {space_id}'),
-                    'space_type': space_type,
-                    'current_area': round(current_area, 2),
-                    'recommended_area': round(new_area, 2),
-                    'area_change': round(new_area - current_area, 2),
-                    'area_change_percent': round(area_change_percent, 2),
-                    'current_capacity': round(current_capacity, 0),
-                    'recommended_capacity': round(new_capacity, 0),
-                    'capacity_change': round(new_capacity - current_capacity, 0),
-                    'current_efficiency': round(current_efficiency * 100, 2),
-                    'projected_efficiency': round(new_efficiency * 100, 2),
-                    'efficiency_change': round(efficiency_change, 2),
-                    'financial_impact': {
-                        'cost_impact': round(cost_impact, 0),
-                        'annual_revenue_impact': round(revenue_impact, 0),
-                        'payback_period': round(cost_impact / revenue_impact, 2) if revenue_impact > 0 else float('inf')
-                    }
+                    'space_type': space_info.get('type', 'unknown'),
+                    **dict(zip(report_keys, report_row)),
+                    'financial_impact': dict(zip(financial_keys, financial_row))
                 }
             
             return {